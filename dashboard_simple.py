@@ -6,10 +6,38 @@ Muestra transformación ANTES (Synthea) vs DESPUÉS (OMOP)
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from pathlib import Path
 import json
+import mmap
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+try:
+    import pyarrow.csv as pac
+except ImportError:
+    pac = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Parser JSON en C si está disponible (json.loads también acepta bytes)
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # Configuración de página
 st.set_page_config(
@@ -28,72 +56,461 @@ COLORS = {
     'gray': '#64748b'
 }
 
-@st.cache_data
-def load_real_data():
-    """Cargar datos reales ANTES y DESPUÉS de la transformación"""
-    
-    # ANTES - Datos Synthea originales (RUTA CORREGIDA)
-    synthea_path = Path("data/synthea")
-    synthea_data = {}
-    synthea_files = [
-        "patients.csv", "encounters.csv", "conditions.csv", 
-        "medications.csv", "procedures.csv", "observations.csv",
-        "allergies.csv", "organizations.csv", "providers.csv"
-    ]
+class TableSpec(NamedTuple):
+    """Correspondencia de una tabla Synthea con sus tablas OMOP destino"""
+    synthea: str
+    omop: Tuple[str, ...]  # Una: integridad 1:1; varias: dividido; ninguna: incluido en observation
+    synthea_label: str
+    omop_label: str
+    chart_label: str = ''  # Vacío si no aparece en el gráfico de comparación
+
+# Fuente única de tablas para la carga de datos y la comparación
+TABLES = (
+    TableSpec('patients', ('person',), '👥 patients', '👥 person', 'Pacientes'),
+    TableSpec('encounters', ('visit_occurrence',), '🏥 encounters', '🏥 visit_occurrence', 'Encuentros'),
+    TableSpec('conditions', ('condition_occurrence',), '🔬 conditions', '🔬 condition_occurrence', 'Condiciones'),
+    TableSpec('medications', ('drug_exposure',), '💊 medications', '💊 drug_exposure', 'Medicamentos'),
+    TableSpec('procedures', ('procedure_occurrence',), '⚕️ procedures', '⚕️ procedure_occurrence', 'Procedimientos'),
+    TableSpec('observations', ('measurement', 'observation'), '📊 observations', '📊 measurement + observation'),
+    TableSpec('organizations', ('care_site', 'location'), '🏥 organizations', '🏥 care_site + location'),
+    TableSpec('providers', ('provider',), '👨‍⚕️ providers', '👨‍⚕️ provider'),
+    TableSpec('patients', ('observation_period',), '👥 patients (períodos)', '📅 observation_period'),
+    TableSpec('allergies', (), '🤧 allergies', '📝 observation (alergias)'),
+)
+
+# Filas del gráfico de comparación
+CHART_TABLES = tuple(spec for spec in TABLES if spec.chart_label)
+
+# Tablas que necesita cada página (la barra lateral usa siempre SIDEBAR_TABLES)
+ALL_TABLES = frozenset(
+    [spec.synthea for spec in TABLES] + [table_name for spec in TABLES for table_name in spec.omop]
+)
+SIDEBAR_TABLES = frozenset({'patients', 'encounters', 'conditions', 'medications', 'person'})
+PAGE_DEPENDENCIES = {
+    "Resumen Ejecutivo": ALL_TABLES,
+    "Comparación Detallada": ALL_TABLES,
+    "Mapeo de Conceptos": SIDEBAR_TABLES,
+    "Análisis de Mapeo Detallado": SIDEBAR_TABLES | {'procedures', 'observations'}
+}
+
+# Condiciones gastro sin mapear: (código ICD-10, descripción, sugerencia SNOMED)
+CONDITION_CODES = (
+    ("K29.9", "Gastritis no especificada", "SNOMED: 4247120"),
+    ("K21.0", "Enfermedad por reflujo gastroesofágico", "SNOMED: 235595009"),
+    ("K59.0", "Estreñimiento", "SNOMED: 14760008"),
+    ("K92.2", "Hemorragia gastrointestinal", "SNOMED: 74474003"),
+    ("K25.9", "Úlcera gástrica no especificada", "SNOMED: 13200003"),
+    ("K30", "Dispepsia funcional", "SNOMED: 162031009"),
+    ("K50.9", "Enfermedad de Crohn", "SNOMED: 34000006"),
+    ("K51.9", "Colitis ulcerosa", "SNOMED: 64766004"),
+    ("K80.2", "Cálculos biliares", "SNOMED: 235919008"),
+    ("K57.9", "Diverticulosis", "SNOMED: 307496006")
+)
+
+# Medicamentos sin mapear: (medicamento, código ATC, sugerencia RxNorm)
+DRUG_CODES = (
+    ("Omeprazol 20mg", "A02BC01", "RxNorm: 7646"),
+    ("Lansoprazol 30mg", "A02BC03", "RxNorm: 17128"),
+    ("Mesalazina 500mg", "A07EC02", "RxNorm: 6759"),
+    ("Pantoprazol 40mg", "A02BC02", "RxNorm: 40790"),
+    ("Sucralfato 1g", "A02BX02", "RxNorm: 10156")
+)
+
+# Procedimientos sin mapear: (código CPT, descripción, sugerencia SNOMED)
+PROCEDURE_CODES = (
+    ("43239", "Endoscopia digestiva alta", "SNOMED: 423827005"),
+    ("45378", "Colonoscopia diagnóstica", "SNOMED: 73761001"),
+    ("43235", "Esofagogastroduodenoscopia", "SNOMED: 423827005")
+)
+
+# Mediciones sin mapear: (parámetro, valor, sugerencia LOINC)
+MEASUREMENT_CODES = (
+    ("Hemoglobina", "12.5 g/dL", "LOINC: 718-7"),
+    ("Ferritina sérica", "45 ng/mL", "LOINC: 2276-4"),
+    ("Vitamina B12", "180 pg/mL", "LOINC: 2132-9"),
+    ("Creatinina", "1.1 mg/dL", "LOINC: 2160-0")
+)
+
+class UnmappedSpec(NamedTuple):
+    """Cómo generar la tabla de registros sin mapear de una tabla Synthea"""
+    prefix: str  # Prefijo del ID (COND_, MED_, ...)
+    codes: Tuple[Tuple[str, str, str], ...]  # (col1, col2, sugerencia) por registro
+    columns: Tuple[str, str]
+    patient_step: int  # Registro i -> PATIENT_IDS[(i*patient_step) % 30]
+    estado: str
+    estado_tail: str = ''  # Estado a partir del registro estado_rows + 1 (vacío: el mismo para todos)
+    estado_rows: int = 0
+    high_priority: Tuple[int, ...] = ()  # Números de registro con prioridad ALTA
+
+# Tablas de registros sin mapear, por tabla Synthea
+UNMAPPED_SPECS = {
+    'conditions': UnmappedSpec("COND_", CONDITION_CODES, ("Código ICD-10", "Descripción"), 3, "Sin SNOMED",
+                               high_priority=(1, 2, 3, 4, 5)),
+    'medications': UnmappedSpec("MED_", DRUG_CODES, ("Medicamento", "Código ATC"), 2, "Sin RxNorm",
+                                estado_tail="Sin ATC ni RxNorm", estado_rows=4, high_priority=(5,)),
+    'procedures': UnmappedSpec("PROC_", PROCEDURE_CODES, ("Código CPT", "Descripción"), 5, "Sin SNOMED"),
+    'observations': UnmappedSpec("MEAS_", MEASUREMENT_CODES, ("Parámetro", "Valor"), 4, "Sin LOINC")
+}
+
+# Totales de ejemplo si falta el CSV Synthea correspondiente
+UNMAPPED_DEFAULT_TOTALS = {'conditions': 54, 'medications': 42, 'procedures': 38, 'observations': 28}
+
+# Progreso simulado del mapeo por categoría: % actual frente al objetivo
+PROGRESS_CATEGORIES = ('Demográficos', 'Gastroenterología', 'Visitas', 'Medicamentos', 'Procedimientos', 'Mediciones')
+CURRENT_PCT = (100, 46.7, 95, 88, 92, 85)
+TARGET_PCT = (100, 95, 98, 95, 95, 90)
+# Índice categórico ordenado para que st.bar_chart respete el orden de las categorías
+PROGRESS_DF = pd.DataFrame(
+    {"Actual": CURRENT_PCT, "Objetivo": TARGET_PCT},
+    index=pd.CategoricalIndex(PROGRESS_CATEGORIES, categories=PROGRESS_CATEGORIES, ordered=True, name="Categoría")
+)
+
+# Secciones estáticas en columnas: (título, elementos), renderizadas como un único bloque HTML
+ACTION_COLUMNS = (
+    ("Para Gastroenterología:", (
+        "✅ Usar vocabulario SNOMED-CT para gastroenterología",
+        "✅ Implementar mapeo automático ICD-10 → SNOMED",
+        "✅ Revisar conceptos personalizados de Galicia"
+    )),
+    ("Para Medicamentos:", (
+        "✅ Actualizar vocabulario RxNorm",
+        "✅ Mapear códigos ATC → RxNorm",
+        "✅ Incluir medicamentos específicos de España"
+    ))
+)
+TOOLS_COLUMNS = (
+    ("🔍 ATHENA OHDSI", (
+        "Vocabularios estándar OMOP",
+        "Búsqueda de conceptos",
+        "Mapeos automáticos",
+        '<a href="https://athena.ohdsi.org">athena.ohdsi.org</a>'
+    )),
+    ("📊 USAGI (OHDSI)", (
+        "⚠️ Solo si necesitamos de un mapeo manual",
+        "Algoritmos de similitud",
+        "Validación individual",
+        "❌ No necesario con Framework IDARA"
+    )),
+    ("🤖 Framework IDARA", (
+        "Reglas personalizadas",
+        "Mapeo específico Galicia",
+        "Validación automática",
+        "Integración con BD"
+    ))
+)
+
+# Títulos de las tablas de registros sin mapear, por opción del selector
+UNMAPPED_TITLES = {
+    "🫃 Condiciones": "### 🫃 **condition_occurrence (Condiciones) Sin Mapear**",
+    "💊 Medicamentos": "### 💊 **drug_exposure (Medicamentos) Sin Mapear**",
+    "⚕️ Procedimientos": "### ⚕️ **procedure_occurrence (Procedimientos) Sin Mapear**",
+    "📊 Mediciones": "### 📊 **measurement (Mediciones) Sin Mapear**"
+}
+
+# Tipos de columna fijos para las tablas de registros sin mapear: texto salvo la prioridad,
+# y Estado/Prioridad como categorías en lugar de cadenas con emoji (sin pasar por Styler)
+PRIORITY_LEVELS = ("ALTA", "MEDIA")
+UNMAPPED_CATEGORIES = {"Estado": "category", "Prioridad": pd.CategoricalDtype(PRIORITY_LEVELS)}
+UNMAPPED_COLUMN_CONFIG = {
+    **{
+        name: st.column_config.TextColumn(name)
+        for name in (
+            "ID", "Código ICD-10", "Descripción", "Medicamento", "Código ATC", "Código CPT",
+            "Parámetro", "Valor", "Paciente", "Fecha", "Estado", "Sugerencia"
+        )
+    },
+    "Prioridad": st.column_config.SelectboxColumn("Prioridad", options=PRIORITY_LEVELS)
+}
+
+# Tablas de búsqueda para los registros de ejemplo: PAT_001..PAT_030 y fechas 2024-MM-DD (meses 1-3, días 1-28)
+PATIENT_IDS = np.array([f"PAT_{i:03d}" for i in range(1, 31)])
+RECORD_DATES = np.array([f"2024-{m:02d}-{d:02d}" for m in (1, 2, 3) for d in range(1, 29)])
+
+# Tamaño de bloque para la lectura binaria de CSVs
+READ_CHUNK_SIZE = 1 << 20
+
+# A partir de este tamaño se cuenta sobre el archivo mapeado en memoria (por ventanas)
+MMAP_MIN_SIZE = 1 << 24
+MMAP_WINDOW = 1 << 24
+
+# Lectura opcional con pyarrow (activar con FAST_IO=1)
+USE_ARROW = pac is not None and os.environ.get("FAST_IO") == "1"
+# Método de conteo, guardado en la caché para no mezclar conteos de ambos métodos
+COUNT_MODE = 'arrow' if USE_ARROW else 'lines'
+
+# Caché en disco de conteos y reporte (sobrevive a reinicios de Streamlit)
+COUNTS_CACHE_PATH = Path("_counts_cache.json")
+
+# Hilos máximos para contar archivos en paralelo
+MAX_IO_WORKERS = 16
+
+# Media compilada con numba para coberturas con muchos campos (opcional)
+NUMBA_MIN_SIZE = 256
+
+if njit is not None:
+    @njit(cache=True)
+    def _mean_f64(values):
+        total = 0.0
+        for value in values:
+            total += value
+        return total / len(values)
+else:
+    _mean_f64 = None
+
+def arrow_rowcount(file_path):
+    """Contar registros con el lector CSV de pyarrow en streaming (respeta campos entre comillas)"""
+    read_options = pac.ReadOptions(block_size=READ_CHUNK_SIZE)
+    with pac.open_csv(file_path, read_options=read_options) as reader:
+        names = reader.schema.names
+    # Solo la primera columna y como texto: no hay conversión de tipos que pueda fallar
+    convert_options = pac.ConvertOptions(include_columns=names[:1], column_types={names[0]: 'string'})
+    with pac.open_csv(file_path, read_options=read_options, convert_options=convert_options) as reader:
+        return sum(batch.num_rows for batch in reader)
+
+def fast_rowcount(file_path):
+    """Contar registros de un CSV (pyarrow si FAST_IO, si no líneas menos la cabecera)"""
+    if USE_ARROW:
+        return arrow_rowcount(file_path)
+    
+    newlines, last_byte = count_newlines(file_path)
+    if not last_byte:
+        return 0
+    # Última línea sin salto final
+    if last_byte != b'\n':
+        newlines += 1
+    return max(newlines - 1, 0)
+
+def count_newlines(file_path):
+    """Número de saltos de línea y último byte del archivo"""
+    if os.path.getsize(file_path) >= MMAP_MIN_SIZE:
+        try:
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                buf = np.frombuffer(mm, dtype=np.uint8)
+                newlines = sum(
+                    int(np.count_nonzero(buf[start:start + MMAP_WINDOW] == ord('\n')))
+                    for start in range(0, buf.size, MMAP_WINDOW)
+                )
+                last_byte = mm[-1:]
+                # La vista debe liberarse antes de cerrar el mmap
+                del buf
+            return newlines, last_byte
+        except (OSError, ValueError, BufferError):
+            pass
+    
+    # Archivos pequeños o sin mmap disponible: lectura por bloques
+    newlines = 0
+    last_chunk = b''
+    with open(file_path, 'rb', buffering=READ_CHUNK_SIZE) as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            newlines += chunk.count(b'\n')
+            last_chunk = chunk
+    return newlines, last_chunk[-1:]
+
+def read_pipeline_summary(report_file):
+    """Extraer del reporte de pipeline solo los campos que usa el dashboard"""
+    has_validation = False
+    success_rate = None
+    processing_time = 0
+    concept_rates = []
+    
+    if ijson is not None:
+        # Lectura en streaming: no se materializa el reporte completo
+        # La ruta se sigue con los eventos de claves (los prefijos de ijson no distinguen claves con puntos)
+        path = []
+        with open(report_file, 'rb') as f:
+            for event, value in ijson.basic_parse(f, use_float=True):
+                if event == 'map_key':
+                    path[-1] = value
+                elif event in ('start_map', 'start_array'):
+                    # validation_results solo cuenta si es un objeto
+                    if event == 'start_map' and path == ['validation_results']:
+                        has_validation = True
+                    path.append(None)
+                elif event in ('end_map', 'end_array'):
+                    path.pop()
+                elif event != 'number':
+                    continue
+                elif path == ['validation_results', 'summary', 'overall_success_rate']:
+                    success_rate = value
+                # Los niveles de lista quedan en None: fases y coberturas solo cuentan dentro de objetos
+                elif len(path) == 3 and path[0] == 'phase_performance' and path[1] is not None and path[2] == 'duration_seconds':
+                    processing_time += value
+                elif len(path) == 4 and path[:2] == ['validation_results', 'concept_coverage'] and path[2] is not None and path[3] == 'mapped_rate':
+                    concept_rates.append(value)
+    else:
+        with open(report_file, 'rb') as f:
+            report = _json_loads(f.read())
+        if not isinstance(report, dict):
+            report = {}
+        # Secciones nulas o que no sean objetos se ignoran, igual que en la lectura con ijson
+        validation = report.get('validation_results')
+        if isinstance(validation, dict):
+            has_validation = True
+            summary = validation.get('summary') or {}
+            if isinstance(summary, dict):
+                success_rate = summary.get('overall_success_rate')
+            concept_coverage = validation.get('concept_coverage') or {}
+            if isinstance(concept_coverage, dict):
+                concept_rates = [
+                    stats['mapped_rate'] for stats in concept_coverage.values()
+                    if isinstance(stats, dict) and 'mapped_rate' in stats
+                ]
+        phases = report.get('phase_performance') or {}
+        if isinstance(phases, dict):
+            processing_time = sum(
+                phase.get('duration_seconds', 0)
+                for phase in phases.values() if isinstance(phase, dict)
+            )
+    
+    if has_validation and success_rate is None:
+        success_rate = 0.95
     
-    for file in synthea_files:
-        file_path = synthea_path / file
-        if file_path.exists():
+    return {
+        'success_rate': success_rate,  # None si el reporte no tiene validation_results
+        'processing_time': processing_time,
+        'concept_rates': concept_rates
+    }
+
+def file_cache_key(file_path):
+    """Clave de caché de un archivo: mtime en ns y tamaño"""
+    stat = file_path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+def load_counts_cache():
+    """Leer la caché en disco; vacía si no existe o está corrupta"""
+    try:
+        with open(COUNTS_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_counts_cache(cache):
+    """Escribir la caché en disco de forma atómica"""
+    # Temporal propio por escritura: varias sesiones pueden guardar a la vez
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=COUNTS_CACHE_PATH.parent,
+            prefix=COUNTS_CACHE_PATH.name + '.', suffix='.tmp', delete=False
+        ) as f:
+            tmp_path = f.name
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, COUNTS_CACHE_PATH)
+    except OSError:
+        if tmp_path is not None:
             try:
-                df = pd.read_csv(file_path)
-                table_name = file.replace('.csv', '')
-                synthea_data[table_name] = len(df)
-            except Exception as e:
-                synthea_data[file.replace('.csv', '')] = 0
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def cached_rowcount(file_path, old_entries, new_entries):
+    """Contar registros reutilizando la caché si el archivo y el método de conteo no cambiaron"""
+    key = file_cache_key(file_path) + [COUNT_MODE]
+    entry = old_entries.get(str(file_path))
+    if isinstance(entry, dict) and entry.get('key') == key:
+        rows = entry['rows']
+    else:
+        rows = fast_rowcount(file_path)
+    new_entries[str(file_path)] = {'key': key, 'rows': rows}
+    return rows
+
+def count_tables(table_paths, old_entries, new_entries):
+    """Contar en paralelo los registros de los archivos existentes"""
+    paths = {
+        table_name: file_path for table_name, file_path in table_paths.items()
+        if file_path.exists()
+    }
+    if not paths:
+        return {}
+    
+    counts = {}
+    with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, len(paths))) as executor:
+        futures = {
+            executor.submit(cached_rowcount, file_path, old_entries, new_entries): table_name
+            for table_name, file_path in paths.items()
+        }
+        for future in as_completed(futures):
+            # Un archivo ilegible no aborta el resto del lote
+            try:
+                counts[futures[future]] = future.result()
+            except Exception:
+                counts[futures[future]] = 0
     
-    # DESPUÉS - Datos OMOP transformados (RUTA CORREGIDA)
-    omop_path = Path("data/omop")
-    omop_data = {}
-    omop_files = [
-        "person.csv", "visit_occurrence.csv", "condition_occurrence.csv",
-        "drug_exposure.csv", "procedure_occurrence.csv", "measurement.csv",
-        "observation.csv", "care_site.csv", "location.csv", "provider.csv",
-        "observation_period.csv"
-    ]
+    return {table_name: counts[table_name] for table_name in paths}
+
+@st.cache_data
+def load_tables(subset):
+    """Cargar datos reales ANTES y DESPUÉS de la transformación (solo las tablas de subset)"""
     
-    for file in omop_files:
-        file_path = omop_path / file
-        if file_path.exists():
-            try:
-                df = pd.read_csv(file_path)
-                table_name = file.replace('.csv', '')
-                omop_data[table_name] = len(df)
-            except Exception as e:
-                omop_data[file.replace('.csv', '')] = 0
+    disk_cache = load_counts_cache()
+    old_entries = disk_cache.get('files', {})
+    
+    # ANTES (Synthea) y DESPUÉS (OMOP) en una sola pasada sobre TABLES (RUTAS CORREGIDAS)
+    synthea_path = Path("data/synthea")
+    omop_path = Path("data/omop")
+    synthea_paths = {}
+    omop_paths = {}
+    for spec in TABLES:
+        synthea_paths[spec.synthea] = synthea_path / f"{spec.synthea}.csv"
+        for table_name in spec.omop:
+            omop_paths[table_name] = omop_path / f"{table_name}.csv"
+    
+    # Los nombres de tabla Synthea y OMOP no se solapan: un único lote de hilos
+    requested = {
+        table_name: file_path for table_name, file_path in {**synthea_paths, **omop_paths}.items()
+        if table_name in subset
+    }
+    # Las entradas de caché de otras páginas se conservan
+    requested_keys = {str(file_path) for file_path in requested.values()}
+    new_entries = {key: entry for key, entry in old_entries.items() if key not in requested_keys}
+    counts = count_tables(requested, old_entries, new_entries)
+    synthea_data = {name: counts[name] for name in synthea_paths if name in counts}
+    omop_data = {name: counts[name] for name in omop_paths if name in counts}
     
     # Cargar reporte de pipeline si existe (RUTA CORREGIDA)
-    pipeline_report = {}
+    pipeline_summary = {}
+    report_entry = {}
     reports_path = Path("data")
     if reports_path.exists():
-        pipeline_files = list(reports_path.glob("pipeline_report_*.json"))
-        if pipeline_files:
-            try:
-                with open(pipeline_files[-1], 'r', encoding='utf-8') as f:
-                    pipeline_report = json.load(f)
-            except:
-                pass
+        try:
+            # El más reciente por fecha de modificación, no por orden de nombre
+            report_file = max(
+                reports_path.glob("pipeline_report_*.json"),
+                key=lambda p: p.stat().st_mtime,
+                default=None
+            )
+            if report_file:
+                report_key = [str(report_file)] + file_cache_key(report_file)
+                cached_report = disk_cache.get('pipeline_report', {})
+                if cached_report.get('key') == report_key and 'summary' in cached_report:
+                    pipeline_summary = cached_report['summary']
+                else:
+                    pipeline_summary = read_pipeline_summary(report_file)
+                report_entry = {'key': report_key, 'summary': pipeline_summary}
+        except:
+            pass
+    
+    new_cache = {'files': new_entries, 'pipeline_report': report_entry}
+    if new_cache != disk_cache:
+        save_counts_cache(new_cache)
     
     return {
         'synthea': synthea_data, 
         'omop': omop_data,
-        'pipeline_report': pipeline_report
+        'synthea_total': sum(synthea_data.values()),
+        'omop_total': sum(omop_data.values()),
+        'synthea_files': sum(file_path.exists() for file_path in synthea_paths.values()),
+        'omop_files': sum(file_path.exists() for file_path in omop_paths.values()),
+        'pipeline_summary': pipeline_summary
     }
 
+@st.cache_data
 def calculate_metrics(data):
     """Calcular métricas reales del framework"""
     synthea = data['synthea']
     omop = data['omop']
-    report = data['pipeline_report']
+    report = data['pipeline_summary']
     
     # Métricas básicas
     total_patients = synthea.get('patients', 0)
@@ -112,8 +529,8 @@ def calculate_metrics(data):
     omop_observations = omop.get('observation', 0)
     
     # Tasa de éxito del pipeline
-    if report and 'validation_results' in report:
-        success_rate = report['validation_results'].get('summary', {}).get('overall_success_rate', 0.95)
+    if report.get('success_rate') is not None:
+        success_rate = report['success_rate']
     else:
         # Calcular basándose en integridad de datos
         if total_patients > 0:
@@ -122,29 +539,22 @@ def calculate_metrics(data):
             success_rate = 0.95
     
     # Tiempo de procesamiento
-    processing_time = 180  # Default
-    if report and 'phase_performance' in report:
-        total_time = sum(
-            phase.get('duration_seconds', 0) 
-            for phase in report['phase_performance'].values()
-        )
-        processing_time = total_time if total_time > 0 else 180
+    total_time = report.get('processing_time', 0)
+    processing_time = total_time if total_time > 0 else 180  # Default: 180
     
     # Estado de BD (simulado por ahora)
-    db_connected = len(omop) > 0  # Si hay datos OMOP, asumimos que funcionó
+    db_connected = data['omop_files'] > 0  # Si hay datos OMOP, asumimos que funcionó
     
     # Tasa de mapeo de conceptos
     concept_rate = 0.92  # Default
-    if report and 'validation_results' in report:
-        concept_coverage = report['validation_results'].get('concept_coverage', {})
-        if concept_coverage:
-            # Calcular promedio de concept coverage
-            rates = []
-            for field, stats in concept_coverage.items():
-                if isinstance(stats, dict) and 'mapped_rate' in stats:
-                    rates.append(stats['mapped_rate'])
-            if rates:
-                concept_rate = sum(rates) / len(rates)
+    # Calcular promedio de concept coverage
+    rates = np.fromiter(report.get('concept_rates', ()), dtype=np.float64)
+    if rates.size > NUMBA_MIN_SIZE and _mean_f64 is not None:
+        concept_rate = float(_mean_f64(rates))
+    elif rates.size:
+        concept_rate = float(rates.mean())
+    
+    time_formatted = f"{int(processing_time//60)}m {int(processing_time%60)}s"
     
     return {
         'total_patients': total_patients,
@@ -162,17 +572,15 @@ def calculate_metrics(data):
         'omop_observations': omop_observations,
         'success_rate': success_rate,
         'processing_time': processing_time,
+        'time_formatted': time_formatted,
         'db_connected': db_connected,
         'concept_rate': concept_rate
     }
 
-def main():
-    # Cargar datos reales
-    data = load_real_data()
-    metrics = calculate_metrics(data)
-    
-    # Header
-    st.markdown(f"""
+@lru_cache(maxsize=16)
+def _header_html(total_patients):
+    """HTML de la cabecera principal"""
+    return f"""
     <div style="
         background: linear-gradient(135deg, {COLORS['blue']}, {COLORS['light_blue']});
         color: white;
@@ -183,10 +591,26 @@ def main():
     ">
         <h1>🔵 Dashboard OMOP Framework IDARA</h1>
         <h2>🏛️ Transformación Synthea → OMOP - Gastroenterología Galicia</h2>
-        <p>Datos Reales: {metrics['total_patients']} pacientes transformados</p>
+        <p>Datos Reales: {total_patients} pacientes transformados</p>
     </div>
-    """, unsafe_allow_html=True)
-    
+    """
+
+@lru_cache(maxsize=None)
+def _columns_html(columns):
+    """HTML de varias columnas de listas en un único bloque flex"""
+    cells = "".join(
+        f'<div style="flex: 1; min-width: 200px;"><p><strong>{title}</strong></p>'
+        f'<ul>{"".join(f"<li>{item}</li>" for item in items)}</ul></div>'
+        for title, items in columns
+    )
+    return f'<div style="display: flex; flex-wrap: wrap; gap: 1rem;">{cells}</div>'
+
+@lru_cache(maxsize=64)
+def _summary(label, unmapped, total):
+    """Resumen de registros sin mapear de una tabla"""
+    return f"📊 **Total {label} sin mapear:** {unmapped} de {total} registros ({unmapped/total*100:.1f}%)"
+
+def main():
     # Sidebar
     with st.sidebar:
         st.markdown("## 🔵 IDARA")
@@ -203,16 +627,24 @@ def main():
         # Navegación simple
         page = st.selectbox(
             "Seleccionar página:",
-            ["Resumen Ejecutivo", "Comparación Detallada", "Mapeo de Conceptos", "Análisis de Mapeo Detallado"]
+            list(PAGE_DEPENDENCIES)
         )
-        
+    
+    # Cargar datos reales (solo las tablas de la página seleccionada)
+    data = load_tables(PAGE_DEPENDENCIES[page])
+    metrics = calculate_metrics(data)
+    
+    # Header
+    st.markdown(_header_html(metrics['total_patients']), unsafe_allow_html=True)
+    
+    with st.sidebar:
         st.markdown("---")
         st.markdown("### 📊 Estado del Sistema")
         
         if metrics['total_patients'] > 0 and metrics['omop_persons'] > 0:
             st.success("✅ Datos reales cargados")
-            st.success(f"✅ {len(data['synthea'])} archivos Synthea")
-            st.success(f"✅ {len(data['omop'])} tablas OMOP")
+            st.success(f"✅ {data['synthea_files']} archivos Synthea")
+            st.success(f"✅ {data['omop_files']} tablas OMOP")
         elif metrics['total_patients'] > 0:
             st.warning("⚠️ Solo datos Synthea")
         else:
@@ -236,7 +668,7 @@ def main():
         else:
             st.warning(f"⚠️ Éxito: {metrics['success_rate']:.1%}")
         
-        st.markdown(f"⏱️ Tiempo: {int(metrics['processing_time']//60)}m {int(metrics['processing_time']%60)}s")
+        st.markdown(f"⏱️ Tiempo: {metrics['time_formatted']}")
     
     # Contenido principal
     if page == "Resumen Ejecutivo":
@@ -254,70 +686,20 @@ def render_executive_summary(metrics, data):
     # Métricas en columnas
     col1, col2, col3, col4 = st.columns(4)
     
-    with col1:
-        st.markdown(f"""
-        <div style="
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            border-left: 5px solid {COLORS['blue']};
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        ">
-            <h4>👥 Pacientes Gallegos</h4>
-            <h2 style="color: {COLORS['blue']};">{metrics['total_patients']}</h2>
-            <p>Gastroenterología</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        color = COLORS['green'] if metrics['success_rate'] >= 0.9 else COLORS['yellow']
-        st.markdown(f"""
-        <div style="
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            border-left: 5px solid {color};
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        ">
-            <h4>✅ Tasa de Éxito</h4>
-            <h2 style="color: {color};">{metrics['success_rate']:.1%}</h2>
-            <p>Objetivo: ≥90%</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        time_color = COLORS['green'] if metrics['processing_time'] < 300 else COLORS['yellow']
-        time_formatted = f"{int(metrics['processing_time']//60)}m {int(metrics['processing_time']%60)}s"
-        st.markdown(f"""
-        <div style="
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            border-left: 5px solid {time_color};
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        ">
-            <h4>⏱️ Tiempo Procesamiento</h4>
-            <h2 style="color: {time_color};">{time_formatted}</h2>
-            <p>Objetivo: < 5min</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        db_color = COLORS['green'] if metrics['db_connected'] else COLORS['red']
-        db_status = "Conectada" if metrics['db_connected'] else "Desconectada"
-        st.markdown(f"""
-        <div style="
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            border-left: 5px solid {db_color};
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        ">
-            <h4>🔗 BD IDARA</h4>
-            <h2 style="color: {db_color};">{db_status}</h2>
-            <p>Conceptos OMOP</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Verde si se cumple el objetivo, rojo si no (delta_color="inverse")
+    col1.metric("👥 Pacientes Gallegos", metrics['total_patients'], "Gastroenterología", delta_color="off")
+    col2.metric(
+        "✅ Tasa de Éxito", f"{metrics['success_rate']:.1%}", "Objetivo: ≥90%",
+        delta_color="normal" if metrics['success_rate'] >= 0.9 else "inverse"
+    )
+    col3.metric(
+        "⏱️ Tiempo Procesamiento", metrics['time_formatted'], "Objetivo: < 5min",
+        delta_color="normal" if metrics['processing_time'] < 300 else "inverse"
+    )
+    col4.metric(
+        "🔗 BD IDARA", "Conectada" if metrics['db_connected'] else "Desconectada", "Conceptos OMOP",
+        delta_color="normal" if metrics['db_connected'] else "inverse"
+    )
     
     # Cuello de botella principal
     st.markdown("---")
@@ -334,23 +716,9 @@ def render_executive_summary(metrics, data):
     st.markdown("---")
     st.markdown("## **Resumen de Transformación Synthea → OMOP**")
     
-    # Datos para el gráfico
-    synthea_total = sum([
-        metrics['total_patients'], metrics['total_encounters'], 
-        metrics['total_conditions'], metrics['total_medications'],
-        metrics['total_procedures'], metrics['total_observations'],
-        data['synthea'].get('allergies', 0), data['synthea'].get('organizations', 0),
-        data['synthea'].get('providers', 0)
-    ])
-    
-    omop_total = sum([
-        metrics['omop_persons'], metrics['omop_visits'],
-        metrics['omop_conditions'], metrics['omop_drugs'],
-        metrics['omop_procedures'], metrics['omop_measurements'],
-        metrics['omop_observations'], data['omop'].get('care_site', 0),
-        data['omop'].get('location', 0), data['omop'].get('provider', 0),
-        data['omop'].get('observation_period', 0)
-    ])
+    # Totales precalculados en load_tables
+    synthea_total = data['synthea_total']
+    omop_total = data['omop_total']
     
     col1, col2 = st.columns(2)
     
@@ -460,106 +828,14 @@ def render_executive_summary(metrics, data):
             **Acción:** Actualizar mapeos semánticos 🔄
             """)
 
-def render_comparison(data, metrics):
-    st.markdown("## **Comparación Detallada Synthea → OMOP**")
-    
-    # Crear tabla de comparación con datos reales
-    comparison_data = [
-        {
-            'Tabla Synthea': '👥 patients', 
-            'Registros Synthea': str(data['synthea'].get('patients', 0)), 
-            'Tabla OMOP': '👥 person', 
-            'Registros OMOP': str(data['omop'].get('person', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('patients', 0) == data['omop'].get('person', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '🏥 encounters', 
-            'Registros Synthea': str(data['synthea'].get('encounters', 0)), 
-            'Tabla OMOP': '🏥 visit_occurrence', 
-            'Registros OMOP': str(data['omop'].get('visit_occurrence', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('encounters', 0) == data['omop'].get('visit_occurrence', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '🔬 conditions', 
-            'Registros Synthea': str(data['synthea'].get('conditions', 0)), 
-            'Tabla OMOP': '🔬 condition_occurrence', 
-            'Registros OMOP': str(data['omop'].get('condition_occurrence', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('conditions', 0) == data['omop'].get('condition_occurrence', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '💊 medications', 
-            'Registros Synthea': str(data['synthea'].get('medications', 0)), 
-            'Tabla OMOP': '💊 drug_exposure', 
-            'Registros OMOP': str(data['omop'].get('drug_exposure', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('medications', 0) == data['omop'].get('drug_exposure', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '⚕️ procedures', 
-            'Registros Synthea': str(data['synthea'].get('procedures', 0)), 
-            'Tabla OMOP': '⚕️ procedure_occurrence', 
-            'Registros OMOP': str(data['omop'].get('procedure_occurrence', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('procedures', 0) == data['omop'].get('procedure_occurrence', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '📊 observations', 
-            'Registros Synthea': str(data['synthea'].get('observations', 0)), 
-            'Tabla OMOP': '📊 measurement + observation', 
-            'Registros OMOP': str(data['omop'].get('measurement', 0) + data['omop'].get('observation', 0)), 
-            'Integridad': '✅ Dividido' if (data['omop'].get('measurement', 0) + data['omop'].get('observation', 0)) > 0 else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '🏥 organizations', 
-            'Registros Synthea': str(data['synthea'].get('organizations', 0)), 
-            'Tabla OMOP': '🏥 care_site + location', 
-            'Registros OMOP': str(data['omop'].get('care_site', 0) + data['omop'].get('location', 0)), 
-            'Integridad': '✅ Dividido' if (data['omop'].get('care_site', 0) + data['omop'].get('location', 0)) > 0 else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '👨‍⚕️ providers', 
-            'Registros Synthea': str(data['synthea'].get('providers', 0)), 
-            'Tabla OMOP': '👨‍⚕️ provider', 
-            'Registros OMOP': str(data['omop'].get('provider', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('providers', 0) == data['omop'].get('provider', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '👥 patients (períodos)', 
-            'Registros Synthea': str(data['synthea'].get('patients', 0)), 
-            'Tabla OMOP': '📅 observation_period', 
-            'Registros OMOP': str(data['omop'].get('observation_period', 0)), 
-            'Integridad': '✅ 100%' if data['synthea'].get('patients', 0) == data['omop'].get('observation_period', 0) else '⚠️ Revisar'
-        },
-        {
-            'Tabla Synthea': '🤧 allergies', 
-            'Registros Synthea': str(data['synthea'].get('allergies', 0)), 
-            'Tabla OMOP': '📝 observation (alergias)', 
-            'Registros OMOP': 'Incluido en observation', 
-            'Integridad': '✅ Transformado' if data['synthea'].get('allergies', 0) > 0 else '⚠️ Sin datos'
-        }
-    ]
-    
-    df = pd.DataFrame(comparison_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
-    
-    # Gráfico con datos reales
-    st.markdown("### **Visualización de la Transformación**")
-    
+# cache_resource devuelve el mismo go.Figure sin copiarlo; st.plotly_chart no lo modifica
+# y, a diferencia de un dict, no vuelve a validarlo en cada llamada
+@st.cache_resource
+def build_comparison_fig(synthea_counts, omop_counts):
+    """Figura Synthea vs OMOP, reutilizada mientras no cambien los conteos"""
     fig = go.Figure()
     
-    tables = ['Pacientes', 'Encuentros', 'Condiciones', 'Medicamentos', 'Procedimientos']
-    synthea_counts = [
-        data['synthea'].get('patients', 0),
-        data['synthea'].get('encounters', 0), 
-        data['synthea'].get('conditions', 0),
-        data['synthea'].get('medications', 0),
-        data['synthea'].get('procedures', 0)
-    ]
-    omop_counts = [
-        data['omop'].get('person', 0),
-        data['omop'].get('visit_occurrence', 0),
-        data['omop'].get('condition_occurrence', 0),
-        data['omop'].get('drug_exposure', 0),
-        data['omop'].get('procedure_occurrence', 0)
-    ]
+    tables = [spec.chart_label for spec in CHART_TABLES]
     
     fig.add_trace(go.Bar(
         name='📥 Synthea (Origen)',
@@ -587,7 +863,48 @@ def render_comparison(data, metrics):
         height=500
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def render_comparison(data, metrics):
+    st.markdown("## **Comparación Detallada Synthea → OMOP**")
+    
+    # Crear tabla de comparación con datos reales
+    n_rows = len(TABLES)
+    synthea_vals = np.fromiter(
+        (data['synthea'].get(spec.synthea, 0) for spec in TABLES),
+        dtype=np.int64, count=n_rows
+    )
+    omop_vals = np.fromiter(
+        (sum(data['omop'].get(table_name, 0) for table_name in spec.omop) for spec in TABLES),
+        dtype=np.int64, count=n_rows
+    )
+    n_omop_tables = np.fromiter((len(spec.omop) for spec in TABLES), dtype=np.int64, count=n_rows)
+    
+    integrity = np.select(
+        [n_omop_tables == 1, n_omop_tables > 1],
+        [
+            np.where(synthea_vals == omop_vals, '✅ 100%', '⚠️ Revisar'),
+            np.where(omop_vals > 0, '✅ Dividido', '⚠️ Revisar')
+        ],
+        default=np.where(synthea_vals > 0, '✅ Transformado', '⚠️ Sin datos')
+    )
+    
+    df = pd.DataFrame({
+        'Tabla Synthea': [spec.synthea_label for spec in TABLES],
+        'Registros Synthea': synthea_vals.astype(str),
+        'Tabla OMOP': [spec.omop_label for spec in TABLES],
+        'Registros OMOP': np.where(n_omop_tables > 0, omop_vals.astype(str), 'Incluido en observation'),
+        'Integridad': integrity
+    })
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    # Gráfico con datos reales
+    st.markdown("### **Visualización de la Transformación**")
+    
+    synthea_counts = tuple(data['synthea'].get(spec.synthea, 0) for spec in CHART_TABLES)
+    omop_counts = tuple(data['omop'].get(spec.omop[0], 0) for spec in CHART_TABLES)
+    
+    st.plotly_chart(build_comparison_fig(synthea_counts, omop_counts), use_container_width=True)
     
     # Estadísticas adicionales
     st.markdown("### 📈 **Estadísticas de Transformación**")
@@ -666,10 +983,38 @@ def render_concepts(metrics):
         - **Conceptos fuente:** Validar contra Athena
         """)
 
+def _zero_padded(prefix, values, width=3):
+    """Códigos tipo PREFIJO_001 a partir de un array de enteros"""
+    return np.char.add(prefix, np.char.zfill(values.astype(str), width))
+
+@lru_cache(maxsize=None)
+def _codes_array(codes):
+    """Tupla de códigos como array (n, 3), convertida una sola vez; los cortes son vistas"""
+    return np.array(codes, dtype=object)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _build_unmapped_df(spec, unmapped):
+    """Registros sin mapear de una tabla (los primeros `unmapped` de spec.codes)"""
+    rows = _codes_array(spec.codes)[:unmapped]
+    i = np.arange(1, len(rows) + 1)
+    return pd.DataFrame({
+        "ID": _zero_padded(spec.prefix, i),
+        spec.columns[0]: rows[:, 0],
+        spec.columns[1]: rows[:, 1],
+        "Paciente": PATIENT_IDS[(i*spec.patient_step) % 30],
+        "Fecha": RECORD_DATES[(i % 3) * 28 + (i % 28)],
+        "Estado": np.where(i > spec.estado_rows, spec.estado_tail, spec.estado) if spec.estado_tail else spec.estado,
+        "Sugerencia": rows[:, 2],
+        "Prioridad": np.where(np.isin(i, spec.high_priority), "ALTA", "MEDIA")
+    }, dtype=object, copy=False).astype(UNMAPPED_CATEGORIES)
+
 def render_mapping_analysis(data, metrics):
     st.markdown("##**Análisis de Mapeo Detallado**")
     st.markdown("### Identificación de Conceptos Faltantes y Estrategias de Mejora")
     
+    # Totales Synthea con valores de ejemplo para las tablas que no se hayan encontrado
+    synthea = {**UNMAPPED_DEFAULT_TOTALS, **data['synthea']}
+    
     # Análisis por categorías
     col1, col2 = st.columns([1, 1])
     
@@ -710,228 +1055,105 @@ def render_mapping_analysis(data, metrics):
     st.markdown("---")
     st.markdown("####**Acciones Recomendadas**")
     
-    col1_actions, col2_actions = st.columns(2)
-    
-    with col1_actions:
-        st.markdown("**Para Gastroenterología:**")
-        st.markdown("""
-        - ✅ Usar vocabulario SNOMED-CT para gastroenterología
-        - ✅ Implementar mapeo automático ICD-10 → SNOMED
-        - ✅ Revisar conceptos personalizados de Galicia
-        """)
-    
-    with col2_actions:
-        st.markdown("**Para Medicamentos:**")
-        st.markdown("""
-        - ✅ Actualizar vocabulario RxNorm
-        - ✅ Mapear códigos ATC → RxNorm
-        - ✅ Incluir medicamentos específicos de España
-        """)
+    st.markdown(_columns_html(ACTION_COLUMNS), unsafe_allow_html=True)
     
     # Sección completa de registros no mapeados
     st.markdown("---")
     st.markdown("## 📋 **Registros Completos No Mapeados por Tabla**")
     
-    # Pestañas para cada tabla
-    tab1, tab2, tab3, tab4 = st.tabs(["🫃 Condiciones", "💊 Medicamentos", "⚕️ Procedimientos", "📊 Mediciones"])
+    # Selector de tabla: a diferencia de st.tabs, solo se construye la tabla visible
+    selected = st.radio(
+        "Tabla:",
+        list(UNMAPPED_TITLES),
+        horizontal=True,
+        key="unmapped_tab"
+    )
+    st.markdown(UNMAPPED_TITLES[selected])
     
-    with tab1:
-        st.markdown("### 🫃 **condition_occurrence (Condiciones) Sin Mapear**")
-        
+    if selected == "🫃 Condiciones":
         # Obtener números reales de los datos
-        total_conditions = data['synthea'].get('conditions', 54)  # Datos reales
-        mapped_conditions = int(total_conditions * 0.467)  # 46.7% mapeado
-        unmapped_conditions = total_conditions - mapped_conditions
-        
-        # Tabla expandida de condiciones con datos reales
-        conditions_unmapped = []
-        condition_codes = [
-            ("K29.9", "Gastritis no especificada", "SNOMED: 4247120"),
-            ("K21.0", "Enfermedad por reflujo gastroesofágico", "SNOMED: 235595009"),
-            ("K59.0", "Estreñimiento", "SNOMED: 14760008"),
-            ("K92.2", "Hemorragia gastrointestinal", "SNOMED: 74474003"),
-            ("K25.9", "Úlcera gástrica no especificada", "SNOMED: 13200003"),
-            ("K30", "Dispepsia funcional", "SNOMED: 162031009"),
-            ("K50.9", "Enfermedad de Crohn", "SNOMED: 34000006"),
-            ("K51.9", "Colitis ulcerosa", "SNOMED: 64766004"),
-            ("K80.2", "Cálculos biliares", "SNOMED: 235919008"),
-            ("K57.9", "Diverticulosis", "SNOMED: 307496006")
-        ]
-        
-        for i, (code, desc, snomed) in enumerate(condition_codes[:unmapped_conditions], 1):
-            conditions_unmapped.append({
-                "ID": f"COND_{i:03d}",
-                "Código ICD-10": code,
-                "Descripción": desc,
-                "Paciente": f"PAT_{(i*3)%30+1:03d}",
-                "Fecha": f"2024-0{(i%3)+1}-{(i%28)+1:02d}",
-                "Estado": "🔴 Sin SNOMED",
-                "Sugerencia": snomed,
-                "Prioridad": "🔥 ALTA" if i <= 5 else "🟡 MEDIA"
-            })
-        
-        df_conditions = pd.DataFrame(conditions_unmapped)
-        st.dataframe(df_conditions, width=1200, hide_index=True)
+        total_conditions = synthea['conditions']  # Datos reales
+        unmapped_conditions = total_conditions - total_conditions * 467 // 1000  # 46.7% mapeado
         
-        st.info(f"📊 **Total condiciones sin mapear:** {unmapped_conditions} de {total_conditions} registros ({(unmapped_conditions/total_conditions)*100:.1f}%)")
+        if unmapped_conditions <= 0:
+            st.success("✅ Todo mapeado")
+        else:
+            # Tabla expandida de condiciones con datos reales
+            df_conditions = _build_unmapped_df(UNMAPPED_SPECS['conditions'], unmapped_conditions)
+            st.dataframe(
+                df_conditions, use_container_width=True, hide_index=True,
+                height=min(35 * (len(df_conditions) + 1) + 3, 400), column_config=UNMAPPED_COLUMN_CONFIG
+            )
+            
+            st.info(_summary("condiciones", unmapped_conditions, total_conditions))
     
-    with tab2:
-        st.markdown("### 💊 **drug_exposure (Medicamentos) Sin Mapear**")
-        
+    elif selected == "💊 Medicamentos":
         # Obtener números reales de los datos
-        total_medications = data['synthea'].get('medications', 42)  # Datos reales
-        mapped_medications = int(total_medications * 0.88)  # 88% mapeado
-        unmapped_medications = total_medications - mapped_medications
-        
-        # Tabla expandida de medicamentos con datos reales
-        drugs_unmapped = []
-        drug_codes = [
-            ("Omeprazol 20mg", "A02BC01", "RxNorm: 7646"),
-            ("Lansoprazol 30mg", "A02BC03", "RxNorm: 17128"),
-            ("Mesalazina 500mg", "A07EC02", "RxNorm: 6759"),
-            ("Pantoprazol 40mg", "A02BC02", "RxNorm: 40790"),
-            ("Sucralfato 1g", "A02BX02", "RxNorm: 10156")
-        ]
-        
-        for i, (med, atc, rxnorm) in enumerate(drug_codes[:unmapped_medications], 1):
-            drugs_unmapped.append({
-                "ID": f"MED_{i:03d}",
-                "Medicamento": med,
-                "Código ATC": atc,
-                "Paciente": f"PAT_{(i*2)%30+1:03d}",
-                "Fecha": f"2024-0{(i%3)+1}-{(i%28)+1:02d}",
-                "Estado": "🟡 Sin RxNorm" if i <= 4 else "🔴 Sin ATC ni RxNorm",
-                "Sugerencia": rxnorm,
-                "Prioridad": "🔥 ALTA" if i == 5 else "🟡 MEDIA"
-            })
+        total_medications = synthea['medications']  # Datos reales
+        unmapped_medications = total_medications - total_medications * 88 // 100  # 88% mapeado
         
-        df_drugs_full = pd.DataFrame(drugs_unmapped)
-        st.dataframe(df_drugs_full, width=1200, hide_index=True)
-        
-        st.info(f"📊 **Total medicamentos sin mapear:** {unmapped_medications} de {total_medications} registros ({(unmapped_medications/total_medications)*100:.1f}%)")
+        if unmapped_medications <= 0:
+            st.success("✅ Todo mapeado")
+        else:
+            # Tabla expandida de medicamentos con datos reales
+            df_drugs_full = _build_unmapped_df(UNMAPPED_SPECS['medications'], unmapped_medications)
+            st.dataframe(
+                df_drugs_full, use_container_width=True, hide_index=True,
+                height=min(35 * (len(df_drugs_full) + 1) + 3, 400), column_config=UNMAPPED_COLUMN_CONFIG
+            )
+            
+            st.info(_summary("medicamentos", unmapped_medications, total_medications))
     
-    with tab3:
-        st.markdown("### ⚕️ **procedure_occurrence (Procedimientos) Sin Mapear**")
-        
+    elif selected == "⚕️ Procedimientos":
         # Obtener números reales de los datos
-        total_procedures = data['synthea'].get('procedures', 38)  # Datos reales
-        mapped_procedures = int(total_procedures * 0.92)  # 92% mapeado
-        unmapped_procedures = total_procedures - mapped_procedures
-        
-        # Tabla de procedimientos con datos reales
-        procedures_unmapped = []
-        procedure_codes = [
-            ("43239", "Endoscopia digestiva alta", "SNOMED: 423827005"),
-            ("45378", "Colonoscopia diagnóstica", "SNOMED: 73761001"),
-            ("43235", "Esofagogastroduodenoscopia", "SNOMED: 423827005")
-        ]
+        total_procedures = synthea['procedures']  # Datos reales
+        unmapped_procedures = total_procedures - total_procedures * 92 // 100  # 92% mapeado
         
-        for i, (cpt, desc, snomed) in enumerate(procedure_codes[:unmapped_procedures], 1):
-            procedures_unmapped.append({
-                "ID": f"PROC_{i:03d}",
-                "Código CPT": cpt,
-                "Descripción": desc,
-                "Paciente": f"PAT_{(i*5)%30+1:03d}",
-                "Fecha": f"2024-0{(i%3)+1}-{(i%28)+1:02d}",
-                "Estado": "🟡 Sin SNOMED",
-                "Sugerencia": snomed,
-                "Prioridad": "🟡 MEDIA"
-            })
-        
-        df_procedures = pd.DataFrame(procedures_unmapped)
-        st.dataframe(df_procedures, width=1200, hide_index=True)
-        
-        st.info(f"📊 **Total procedimientos sin mapear:** {unmapped_procedures} de {total_procedures} registros ({(unmapped_procedures/total_procedures)*100:.1f}%)")
+        if unmapped_procedures <= 0:
+            st.success("✅ Todo mapeado")
+        else:
+            # Tabla de procedimientos con datos reales
+            df_procedures = _build_unmapped_df(UNMAPPED_SPECS['procedures'], unmapped_procedures)
+            st.dataframe(
+                df_procedures, use_container_width=True, hide_index=True,
+                height=min(35 * (len(df_procedures) + 1) + 3, 400), column_config=UNMAPPED_COLUMN_CONFIG
+            )
+            
+            st.info(_summary("procedimientos", unmapped_procedures, total_procedures))
     
-    with tab4:
-        st.markdown("### 📊 **measurement (Mediciones) Sin Mapear**")
-        
+    else:
         # Obtener números reales de los datos
-        total_measurements = data['synthea'].get('observations', 28)  # Datos reales (observations → measurement)
-        mapped_measurements = int(total_measurements * 0.85)  # 85% mapeado
-        unmapped_measurements = total_measurements - mapped_measurements
+        total_measurements = synthea['observations']  # Datos reales (observations → measurement)
+        unmapped_measurements = total_measurements - total_measurements * 85 // 100  # 85% mapeado
         
-        # Tabla de mediciones con datos reales
-        measurements_unmapped = []
-        measurement_codes = [
-            ("Hemoglobina", "12.5 g/dL", "LOINC: 718-7"),
-            ("Ferritina sérica", "45 ng/mL", "LOINC: 2276-4"),
-            ("Vitamina B12", "180 pg/mL", "LOINC: 2132-9"),
-            ("Creatinina", "1.1 mg/dL", "LOINC: 2160-0")
-        ]
-        
-        for i, (param, valor, loinc) in enumerate(measurement_codes[:unmapped_measurements], 1):
-            measurements_unmapped.append({
-                "ID": f"MEAS_{i:03d}",
-                "Parámetro": param,
-                "Valor": valor,
-                "Paciente": f"PAT_{(i*4)%30+1:03d}",
-                "Fecha": f"2024-0{(i%3)+1}-{(i%28)+1:02d}",
-                "Estado": "🟡 Sin LOINC",
-                "Sugerencia": loinc,
-                "Prioridad": "🟡 MEDIA"
-            })
-        
-        df_measurements = pd.DataFrame(measurements_unmapped)
-        st.dataframe(df_measurements, width=1200, hide_index=True)
-        
-        st.info(f"📊 **Total mediciones sin mapear:** {unmapped_measurements} de {total_measurements} registros ({(unmapped_measurements/total_measurements)*100:.1f}%)")
+        if unmapped_measurements <= 0:
+            st.success("✅ Todo mapeado")
+        else:
+            # Tabla de mediciones con datos reales
+            df_measurements = _build_unmapped_df(UNMAPPED_SPECS['observations'], unmapped_measurements)
+            st.dataframe(
+                df_measurements, use_container_width=True, hide_index=True,
+                height=min(35 * (len(df_measurements) + 1) + 3, 400), column_config=UNMAPPED_COLUMN_CONFIG
+            )
+            
+            st.info(_summary("mediciones", unmapped_measurements, total_measurements))
     
     # Sección de herramientas
     st.markdown("---")
     st.markdown("#### 🛠️ **Herramientas para Mejorar el Mapeo**")
     
-    col3, col4, col5 = st.columns(3)
-    
-    with col3:
-        st.markdown("""
-        **🔍 ATHENA OHDSI**
-        - Vocabularios estándar OMOP
-        - Búsqueda de conceptos
-        - Mapeos automáticos
-        - [athena.ohdsi.org](https://athena.ohdsi.org)
-        """)
-    
-    with col4:
-        st.markdown("""
-        **📊 USAGI (OHDSI)**
-        - ⚠️ Solo si necesitamos de un mapeo manual
-        - Algoritmos de similitud
-        - Validación individual
-        - ❌ No necesario con Framework IDARA
-        """)
-    
-    with col5:
-        st.markdown("""
-        **🤖 Framework IDARA**
-        - Reglas personalizadas
-        - Mapeo específico Galicia
-        - Validación automática
-        - Integración con BD
-        """)
+    st.markdown(_columns_html(TOOLS_COLUMNS), unsafe_allow_html=True)
     
     # Métricas de progreso
     st.markdown("---")
     st.markdown("#### 📈 **Plan de Mejora del Mapeo**")
     
-    # Gráfico de progreso simulado
-    categories = ['Demográficos', 'Gastroenterología', 'Visitas', 'Medicamentos', 'Procedimientos', 'Mediciones']
-    current = [100, 46.7, 95, 88, 92, 85]
-    target = [100, 95, 98, 95, 95, 90]
-    
-    fig = go.Figure()
-    fig.add_trace(go.Bar(name='Actual', x=categories, y=current, marker_color=COLORS['light_blue']))
-    fig.add_trace(go.Bar(name='Objetivo', x=categories, y=target, marker_color=COLORS['green']))
-    
-    fig.update_layout(
-        title="🎯 Progreso vs Objetivos de Mapeo",
-        yaxis_title="% Conceptos Mapeados",
-        barmode='group',
-        height=400
+    st.markdown("**🎯 Progreso vs Objetivos de Mapeo**")
+    st.bar_chart(
+        PROGRESS_DF, stack=False, color=[COLORS['light_blue'], COLORS['green']],
+        y_label="% Conceptos Mapeados", height=400
     )
     
-    st.plotly_chart(fig, use_container_width=True)
-    
     # Ventajas del Framework IDARA
     st.markdown("---")
     st.markdown("#### 🚀 **¿Por qué no necesitamos usar USAGI con Framework IDARA?**")